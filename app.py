@@ -1,5 +1,15 @@
-from io import StringIO
+import contextlib
+import hashlib
+import inspect
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import streamlit as st
 
 # ------------------------------------------------------------------#
@@ -37,10 +47,33 @@ if not uploaded_files:
 # ------------------------------------------------------------------#
 # 4. Data loader & cleaner
 # ------------------------------------------------------------------#
+STRIP_CHARS = str.maketrans("", "", ",%")
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null", "-", "na",
+]
+
+def read_csv_table(raw_csv: bytes) -> pa.Table:
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=8 << 20)
+    convert_options = pa_csv.ConvertOptions(null_values=NA_VALUES, strings_can_be_null=True)
+    try:
+        table = pa_csv.read_csv(BytesIO(raw_csv), read_options=read_options, convert_options=convert_options)
+        if not any(pa.types.is_binary(t) for t in table.schema.types):
+            return table
+    except pa.ArrowInvalid:
+        pass
+
+    try:
+        raw_csv.decode("utf-8")
+    except UnicodeDecodeError:
+        raw_csv = raw_csv.decode("utf-8", errors="ignore").encode()
+    names = pa_csv.open_csv(BytesIO(raw_csv), read_options=read_options).schema.names
+    convert_options.column_types = {n: pa.string() for n in names}
+    return pa_csv.read_csv(BytesIO(raw_csv), read_options=read_options, convert_options=convert_options)
+
 @st.cache_data(show_spinner=False)
-def load_and_clean(raw_csv: str) -> pd.DataFrame:
-    df = pd.read_csv(StringIO(raw_csv))
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+def load_and_clean(raw_csv: bytes) -> pd.DataFrame:
+    df = read_csv_table(raw_csv).to_pandas(types_mapper=pd.ArrowDtype)
 
     COL_MAP = {
         "symbol": "symbol",
@@ -57,41 +90,115 @@ def load_and_clean(raw_csv: str) -> pd.DataFrame:
         "close_price": "close",
         "close": "close",
     }
-    df.rename(columns=lambda c: COL_MAP.get(c, c), inplace=True)
+    df.columns = [
+        COL_MAP.get(norm, norm) for norm in (c.strip().lower().replace(" ", "_") for c in df.columns)
+    ]
 
     REQUIRED = ["symbol", "date", "traded_qty", "deliverable_qty", "delivery_pct"]
     missing = [c for c in REQUIRED if c not in df.columns]
     if missing:
         raise ValueError(f"Missing column(s): {', '.join(missing)}")
 
-    df.replace(["-", "NA", "N/A", "na", ""], pd.NA, inplace=True)
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
     df.dropna(subset=["date"], inplace=True)
 
+    # Arrow already types clean numeric columns; only text ones ("1,234", "45%") need stripping
     for col in ["traded_qty", "deliverable_qty", "delivery_pct", "open", "close"]:
-        if col in df.columns:
-            df[col] = (
-                df[col].astype(str)
-                .str.replace(",", "", regex=False)
-                .str.replace("%", "", regex=False)
-                .replace("", pd.NA)
-            )
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            stripped = df[col].astype("string").str.translate(STRIP_CHARS)
+            df[col] = pd.to_numeric(stripped, errors="coerce", dtype_backend="pyarrow")
 
     df.dropna(subset=["traded_qty", "deliverable_qty", "delivery_pct"], inplace=True)
-    df["traded_qty"] = df["traded_qty"].astype(int)
-    df["deliverable_qty"] = df["deliverable_qty"].astype(int)
+    qty = df[["traded_qty", "deliverable_qty"]].astype("int64")
+    # int64 is kept for any file where a single day's volume overflows int32
+    qty_dtype = "int32" if qty.to_numpy().max(initial=0) <= np.iinfo(np.int32).max else "int64"
+    df["traded_qty"] = qty["traded_qty"].astype(qty_dtype)
+    df["deliverable_qty"] = qty["deliverable_qty"].astype(qty_dtype)
 
-    df["net_value"] = df["deliverable_qty"] * df.get("open", 1)
+    df["net_value"] = qty["deliverable_qty"] * df.get("open", 1)
     return df.reset_index(drop=True)
 
 # ------------------------------------------------------------------#
 # 5. Merge all uploaded files
 # ------------------------------------------------------------------#
-df = pd.concat(
-    [load_and_clean(up.read().decode("utf-8", errors="ignore")) for up in uploaded_files],
-    ignore_index=True,
-).drop_duplicates(subset=["symbol", "date"]).sort_values("date")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "delivery-dashboard")
+CACHE_MAX_FILES = 20
+CACHE_MAX_AGE = 7 * 24 * 3600
+
+def read_feather_cache(path):
+    try:
+        df = pd.read_feather(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, pa.ArrowInvalid):
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        return None
+    with contextlib.suppress(OSError):
+        os.utime(path)
+
+    # Feather reads Arrow strings back as StringDtype; restore the dtypes a cold build produces
+    arrow_str = pd.ArrowDtype(pa.string())
+    for col in df.select_dtypes("string").columns:
+        df[col] = df[col].astype(arrow_str)
+    if isinstance(df["symbol"].dtype, pd.CategoricalDtype):
+        df["symbol"] = df["symbol"].cat.rename_categories(df["symbol"].cat.categories.astype(arrow_str))
+    return df
+
+def prune_feather_cache():
+    try:
+        entries = sorted(os.scandir(CACHE_DIR), key=lambda e: e.stat().st_mtime, reverse=True)
+        now = time.time()
+        for i, entry in enumerate(entries):
+            if i >= CACHE_MAX_FILES or now - entry.stat().st_mtime > CACHE_MAX_AGE:
+                os.remove(entry.path)
+    except OSError:
+        pass
+
+def write_feather_cache(df, path):
+    tmp_path = None
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            df.to_feather(fh, compression="zstd")
+        os.replace(tmp_path, path)
+    except (OSError, pa.ArrowInvalid):
+        if tmp_path:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+        return
+    prune_feather_cache()
+
+@st.cache_data(show_spinner=False)
+def build_merged(digests: tuple[str, ...], _blobs: tuple[bytes, ...]) -> pd.DataFrame:
+    version = [inspect.getsource(f) for f in (read_csv_table, load_and_clean, build_merged)]
+    version += [pd.__version__, pa.__version__, np.__version__]
+    key = hashlib.blake2b("".join(version + list(digests)).encode(), digest_size=16).hexdigest()
+    path = os.path.join(CACHE_DIR, f"merged_{key}.feather")
+    cached = read_feather_cache(path)
+    if cached is not None:
+        return cached
+
+    with ThreadPoolExecutor(max_workers=min(8, len(_blobs))) as pool:
+        parts = list(pool.map(load_and_clean, _blobs))
+    df = pd.concat(parts, ignore_index=True)
+    df["symbol"] = df["symbol"].astype("category")
+
+    # Stable lexsort keeps the first occurrence of each (symbol, date), as drop_duplicates does
+    codes = df["symbol"].cat.codes.to_numpy()
+    dates = df["date"].to_numpy(dtype="datetime64[ns]").view("i8")
+    order = np.lexsort((dates, codes))
+    first = np.ones(len(order), dtype=bool)
+    codes, dates = codes[order], dates[order]
+    first[1:] = (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])
+    df = df.iloc[np.sort(order[first])].sort_values("date")
+
+    write_feather_cache(df, path)
+    return df
+
+blobs = tuple(up.getvalue() for up in uploaded_files)
+df = build_merged(tuple(hashlib.blake2b(b, digest_size=16).hexdigest() for b in blobs), blobs)
 
 # ------------------------------------------------------------------#
 # 6. Sidebar filters
@@ -113,41 +220,58 @@ col4.metric("Total Symbols", df["symbol"].nunique())
 # ------------------------------------------------------------------#
 # 8. Spike alerts
 # ------------------------------------------------------------------#
-spikes = df[df["delivery_pct"] >= spike_thr]
-if not spikes.empty:
+spike_mask = df["delivery_pct"].to_numpy() >= spike_thr
+if spike_mask.any():
+    spikes = df.loc[spike_mask, ["date", "symbol", "delivery_pct"]]
     st.warning(f"🚨 {len(spikes)} spike(s) ≥ {spike_thr}%")
-    st.dataframe(spikes[["date", "symbol", "delivery_pct"]])
+    st.dataframe(spikes)
 
 # ------------------------------------------------------------------#
 # 9. Helper: Highlight and Aggregate
 # ------------------------------------------------------------------#
-def highlight_net_value(val):
-    return "background-color: #ffe6e6; font-weight: bold" if pd.notna(val) and val > net_value_thr else ""
+STYLER_MAX_ROWS = 5000
 
-def aggregate(df, freq, label):
-    """Generic aggregator for daily/weekly/monthly/quarterly/half-yearly/yearly."""
-    temp = df.copy()
-    if freq == "D":  # daily
-        temp["period"] = temp["date"]
-    elif freq == "2H":  # half-year
-        temp["period"] = temp["date"].apply(lambda d: pd.Timestamp(f"{d.year}-01-01") if d.month <= 6 else pd.Timestamp(f"{d.year}-07-01"))
-    else:  # other pandas periods
-        temp["period"] = temp["date"].dt.to_period(freq).apply(lambda r: r.start_time)
+def highlight_net_value(col):
+    mask = col.notna() & (col > net_value_thr)
+    return np.where(mask.to_numpy(dtype=bool, na_value=False), "background-color: #ffe6e6; font-weight: bold", "")
 
-    agg = temp.groupby(["period", "symbol"], as_index=False)[["traded_qty", "deliverable_qty", "net_value"]].sum()
-    agg["delivery_pct"] = 100 * agg["deliverable_qty"] / agg["traded_qty"]
+def pct_change_by_symbol(agg, col):
+    """Per-symbol % change of `col`; `agg` must already be sorted by symbol and period."""
+    codes = agg["symbol"].cat.codes.to_numpy()
+    vals = agg[col].to_numpy(dtype="float64")
+    out = np.full(len(vals), np.nan)
+    same = codes[1:] == codes[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = np.where(same, (vals[1:] - vals[:-1]) / vals[:-1] * 100, np.nan)
+    return out
+
+def aggregate(df, period, freq, label):
+    """Generic aggregator for daily/weekly/monthly/quarterly/half-yearly/yearly."""
+    agg = (
+        df.groupby([period.rename("period"), "symbol"], sort=False, observed=True)[["traded_qty", "deliverable_qty", "net_value"]]
+        .sum()
+        .reset_index()
+    )
+    # groupby hands int32 sums back as int32 when they fit; widen so later arithmetic cannot wrap
+    agg[["traded_qty", "deliverable_qty"]] = agg[["traded_qty", "deliverable_qty"]].astype("int64")
+    agg["delivery_pct"] = agg["deliverable_qty"] / agg["traded_qty"] * 100
 
     if freq in ["D", "W", "M"]:
         agg = agg.sort_values(["symbol", "period"])
-        agg["traded_qty_chg_%"] = agg.groupby("symbol")["traded_qty"].pct_change() * 100
-        agg["deliverable_qty_chg_%"] = agg.groupby("symbol")["deliverable_qty"].pct_change() * 100
+        agg["traded_qty_chg_%"] = pct_change_by_symbol(agg, "traded_qty")
+        agg["deliverable_qty_chg_%"] = pct_change_by_symbol(agg, "deliverable_qty")
     else:
-        agg["traded_qty_chg_%"] = pd.NA
-        agg["deliverable_qty_chg_%"] = pd.NA
+        agg = agg.sort_values(["period", "symbol"], ignore_index=True)
+        agg["traded_qty_chg_%"] = np.nan
+        agg["deliverable_qty_chg_%"] = np.nan
 
-    agg["traded_qty_mn"] = (agg["traded_qty"] / 1e6).round(2)
-    agg["deliverable_qty_mn"] = (agg["deliverable_qty"] / 1e6).round(2)
-    agg["net_value_crore"] = (agg["net_value"] / 1e7).round(2)
+    scaled = np.stack(
+        [agg["traded_qty"].to_numpy(), agg["deliverable_qty"].to_numpy(), agg["net_value"].to_numpy()],
+        dtype=np.float64,
+    )
+    scaled /= np.array([[1e6], [1e6], [1e7]])
+    np.round(scaled, 2, out=scaled)
+    agg["traded_qty_mn"], agg["deliverable_qty_mn"], agg["net_value_crore"] = scaled
 
     cols = ["period", "symbol", "traded_qty_mn", "deliverable_qty_mn", "delivery_pct",
             "net_value_crore", "traded_qty_chg_%", "deliverable_qty_chg_%"]
@@ -155,14 +279,29 @@ def aggregate(df, freq, label):
 
     st.markdown(f'<a name="{label.lower()}-delivery-table"></a>', unsafe_allow_html=True)
     st.subheader(f"📅 {label} Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
-    st.dataframe(disp.style.applymap(highlight_net_value, subset=["net_value_crore"]), use_container_width=True)
+    if len(disp) < STYLER_MAX_ROWS:
+        st.dataframe(disp.style.apply(highlight_net_value, subset=["net_value_crore"]), use_container_width=True)
+    else:
+        st.dataframe(
+            disp.assign(net_value_spike=disp["net_value_crore"] > net_value_thr),
+            column_config={"net_value_crore": st.column_config.NumberColumn(format="%.2f")},
+            use_container_width=True,
+        )
 
 # ------------------------------------------------------------------#
 # 10. Show all tables
 # ------------------------------------------------------------------#
-aggregate(df, "D", "Daily")
-aggregate(df, "W", "Weekly")
-aggregate(df, "M", "Monthly")
-aggregate(df, "Q", "Quarterly")
-aggregate(df, "2H", "Half-Yearly")
-aggregate(df, "Y", "Yearly")
+week = df["date"].dt.to_period("W").dt.start_time
+month = df["date"].dt.to_period("M").dt.start_time
+quarter = df["date"].dt.to_period("Q").dt.start_time
+years = df["date"].to_numpy().astype("datetime64[Y]")
+half_offset = np.where(df["date"].dt.month.to_numpy() <= 6, 0, 6).astype("timedelta64[M]")
+half_year = pd.Series((years.astype("datetime64[M]") + half_offset).astype("datetime64[ns]"), index=df.index)
+year = df["date"].dt.to_period("Y").dt.start_time
+
+aggregate(df, df["date"], "D", "Daily")
+aggregate(df, week, "W", "Weekly")
+aggregate(df, month, "M", "Monthly")
+aggregate(df, quarter, "Q", "Quarterly")
+aggregate(df, half_year, "2H", "Half-Yearly")
+aggregate(df, year, "Y", "Yearly")
@@ -1,5 +1,8 @@
-from io import StringIO
+from io import BytesIO
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import altair as alt
 import streamlit as st
 
@@ -35,9 +38,33 @@ if not uploaded_files:
 # ------------------------------------------------------------------#
 # 3. Data loader & cleaner
 # ------------------------------------------------------------------#
+STRIP_CHARS = str.maketrans("", "", ",%")
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null", "-", "na",
+]
+
+def read_csv_table(raw_csv: bytes) -> pa.Table:
+    read_options = pa_csv.ReadOptions()
+    convert_options = pa_csv.ConvertOptions(null_values=NA_VALUES, strings_can_be_null=True)
+    try:
+        table = pa_csv.read_csv(BytesIO(raw_csv), read_options=read_options, convert_options=convert_options)
+        if not any(pa.types.is_binary(t) for t in table.schema.types):
+            return table
+    except pa.ArrowInvalid:
+        pass
+
+    try:
+        raw_csv.decode("utf-8")
+    except UnicodeDecodeError:
+        raw_csv = raw_csv.decode("utf-8", errors="ignore").encode()
+    names = pa_csv.open_csv(BytesIO(raw_csv), read_options=read_options).schema.names
+    convert_options.column_types = {n: pa.string() for n in names}
+    return pa_csv.read_csv(BytesIO(raw_csv), read_options=read_options, convert_options=convert_options)
+
 @st.cache_data(show_spinner=False)
-def load_and_clean(raw_csv: str) -> pd.DataFrame:
-    df = pd.read_csv(StringIO(raw_csv))
+def load_and_clean(raw_csv: bytes) -> pd.DataFrame:
+    df = read_csv_table(raw_csv).to_pandas(types_mapper=pd.ArrowDtype)
     df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
 
     COL_MAP = {
@@ -66,7 +93,6 @@ def load_and_clean(raw_csv: str) -> pd.DataFrame:
     if missing:
         raise ValueError(f"Missing column(s): {', '.join(missing)}")
 
-    df.replace(["-", "NA", "N/A", "na", ""], pd.NA, inplace=True)
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
     df.dropna(subset=["date"], inplace=True)
 
@@ -77,21 +103,17 @@ def load_and_clean(raw_csv: str) -> pd.DataFrame:
         numeric_cols.append("close")
 
     for c in numeric_cols:
-        df[c] = (
-            df[c]
-            .astype(str)
-            .str.replace(",", "", regex=False)
-            .str.replace("%", "", regex=False)
-            .replace("", pd.NA)
-        )
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+        if pd.api.types.is_numeric_dtype(df[c]):
+            continue
+        stripped = df[c].astype("string").str.translate(STRIP_CHARS)
+        df[c] = pd.to_numeric(stripped, errors="coerce", dtype_backend="pyarrow")
 
     df.dropna(subset=["traded_qty", "deliverable_qty", "delivery_pct"], inplace=True)
     df["traded_qty"] = df["traded_qty"].astype(int)
     df["deliverable_qty"] = df["deliverable_qty"].astype(int)
 
     # ✅ Calculate Net Value = Deliverable Qty × Open Price
-    df["net_value"] = pd.NA
+    df["net_value"] = np.nan
     if "open" in df.columns:
         df["net_value"] = df["deliverable_qty"] * df["open"]
 
@@ -102,7 +124,7 @@ def load_and_clean(raw_csv: str) -> pd.DataFrame:
 # ------------------------------------------------------------------#
 dfs = []
 for up in uploaded_files:
-    part = load_and_clean(up.read().decode("utf-8", errors="ignore"))
+    part = load_and_clean(up.read())
     dfs.append(part)
 
 df = (
@@ -168,17 +190,6 @@ if not spikes.empty:
 st.markdown('<a name="daily-delivery-table"></a>', unsafe_allow_html=True)
 st.subheader("📆 Daily Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
 
-df = df.sort_values(["symbol", "date"])
-df["traded_qty_chg_%"] = df.groupby("symbol")["traded_qty"].pct_change() * 100
-df["deliverable_qty_chg_%"] = df.groupby("symbol")["deliverable_qty"].pct_change() * 100
-
-daily_disp = df.copy()
-daily_disp["traded_qty_mn"] = (daily_disp["traded_qty"] / 1e6).round(2)
-daily_disp["deliverable_qty_mn"] = (daily_disp["deliverable_qty"] / 1e6).round(2)
-daily_disp["net_value_crore"] = (daily_disp["net_value"] / 1e7).round(2)
-daily_disp["traded_qty_chg_%"] = daily_disp["traded_qty_chg_%"].round(2)
-daily_disp["deliverable_qty_chg_%"] = daily_disp["deliverable_qty_chg_%"].round(2)
-
 daily_columns = [
     "date",
     "symbol",
@@ -190,12 +201,28 @@ daily_columns = [
     "deliverable_qty_chg_%",
 ]
 
+@st.cache_data(show_spinner=False)
+def augment_daily(df_hash: int, _df: pd.DataFrame) -> pd.DataFrame:
+    daily_disp = _df.sort_values(["symbol", "date"])
+    daily_disp[["traded_qty_chg_%", "deliverable_qty_chg_%"]] = (
+        daily_disp.groupby("symbol", sort=False)[["traded_qty", "deliverable_qty"]].pct_change() * 100
+    )
+
+    daily_disp["traded_qty_mn"] = (daily_disp["traded_qty"] / 1e6).round(2)
+    daily_disp["deliverable_qty_mn"] = (daily_disp["deliverable_qty"] / 1e6).round(2)
+    daily_disp["net_value_crore"] = (daily_disp["net_value"] / 1e7).round(2)
+    daily_disp["traded_qty_chg_%"] = daily_disp["traded_qty_chg_%"].round(2)
+    daily_disp["deliverable_qty_chg_%"] = daily_disp["deliverable_qty_chg_%"].round(2)
+    return daily_disp[daily_columns]
+
+daily_disp = augment_daily(int(pd.util.hash_pandas_object(df).sum()), df)
+
 def highlight_net_value(val):
     if pd.notna(val) and val > net_value_thr:
         return "background-color: #ffe6e6; font-weight: bold"
     return ""
 
-styled_df = daily_disp[daily_columns].style.applymap(
+styled_df = daily_disp.style.applymap(
     highlight_net_value, subset=["net_value_crore"]
 )
 
@@ -207,15 +234,16 @@ st.dataframe(styled_df, use_container_width=True)
 st.markdown('<a name="weekly-delivery-table"></a>', unsafe_allow_html=True)
 st.subheader("📅 Weekly Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
 
-df["week"] = df["date"].dt.to_period("W").apply(lambda r: r.start_time)
+df["week"] = df["date"].dt.to_period("W").dt.start_time
 weekly = (
     df.groupby(["week", "symbol"], as_index=False)[["traded_qty", "deliverable_qty", "net_value"]]
     .sum()
 )
 weekly["delivery_pct"] = 100 * weekly["deliverable_qty"] / weekly["traded_qty"]
 weekly = weekly.sort_values(["symbol", "week"])
-weekly["traded_qty_chg_%"] = weekly.groupby("symbol")["traded_qty"].pct_change() * 100
-weekly["deliverable_qty_chg_%"] = weekly.groupby("symbol")["deliverable_qty"].pct_change() * 100
+weekly[["traded_qty_chg_%", "deliverable_qty_chg_%"]] = (
+    weekly.groupby("symbol", sort=False)[["traded_qty", "deliverable_qty"]].pct_change() * 100
+)
 
 weekly_disp = weekly.copy()
 weekly_disp["traded_qty_million"] = (weekly_disp["traded_qty"] / 1e6).round(2)
@@ -248,15 +276,16 @@ st.markdown('<a name="monthly-delivery-table"></a>', unsafe_allow_html=True)
 st.subheader("📅 Monthly Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
 
 
-df["month"] = df["date"].dt.to_period("M").apply(lambda r: r.start_time)
+df["month"] = df["date"].dt.to_period("M").dt.start_time
 monthly = (
     df.groupby(["month", "symbol"], as_index=False)[["traded_qty", "deliverable_qty", "net_value"]]
     .sum()
 )
 monthly["delivery_pct"] = 100 * monthly["deliverable_qty"] / monthly["traded_qty"]
 monthly = monthly.sort_values(["symbol", "month"])
-monthly["traded_qty_chg_%"] = monthly.groupby("symbol")["traded_qty"].pct_change() * 100
-monthly["deliverable_qty_chg_%"] = monthly.groupby("symbol")["deliverable_qty"].pct_change() * 100
+monthly[["traded_qty_chg_%", "deliverable_qty_chg_%"]] = (
+    monthly.groupby("symbol", sort=False)[["traded_qty", "deliverable_qty"]].pct_change() * 100
+)
 
 monthly_disp = monthly.copy()
 monthly_disp["traded_qty_million"] = (monthly_disp["traded_qty"] / 1e6).round(2)
@@ -286,7 +315,7 @@ st.altair_chart(mo_chart, use_container_width=True)
 st.markdown('<a name="quarterly-delivery-table"></a>', unsafe_allow_html=True)
 st.subheader("📊 Quarterly Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
 
-df["quarter"] = df["date"].dt.to_period("Q").apply(lambda r: r.start_time)
+df["quarter"] = df["date"].dt.to_period("Q").dt.start_time
 quarterly = (
     df.groupby(["quarter", "symbol"], as_index=False)[["traded_qty", "deliverable_qty", "net_value"]]
     .sum()
@@ -318,11 +347,9 @@ st.altair_chart(qt_chart, use_container_width=True)
 st.markdown('<a name="half-yearly-delivery-table"></a>', unsafe_allow_html=True)
 st.subheader("📈 Half-Yearly Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
 
-def get_half_year(d):
-    year = d.year
-    return pd.Timestamp(f"{year}-01-01") if d.month <= 6 else pd.Timestamp(f"{year}-07-01")
-
-df["half_year"] = df["date"].apply(get_half_year)
+years = df["date"].to_numpy().astype("datetime64[Y]")
+half_offset = np.where(df["date"].dt.month.to_numpy() <= 6, 0, 6).astype("timedelta64[M]")
+df["half_year"] = (years.astype("datetime64[M]") + half_offset).astype("datetime64[ns]")
 half_yearly = (
     df.groupby(["half_year", "symbol"], as_index=False)[["traded_qty", "deliverable_qty", "net_value"]]
     .sum()
@@ -358,7 +385,7 @@ st.altair_chart(half_chart, use_container_width=True)
 st.markdown('<a name="yearly-delivery-table"></a>', unsafe_allow_html=True)
 st.subheader("📅 Yearly Delivery % (Quantities in Millions, Net Value in ₹ Crores)")
 
-df["year"] = df["date"].dt.to_period("Y").apply(lambda r: r.start_time)
+df["year"] = df["date"].dt.to_period("Y").dt.start_time
 yearly = (
     df.groupby(["year", "symbol"], as_index=False)[["traded_qty", "deliverable_qty", "net_value"]]
     .sum()